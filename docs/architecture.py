@@ -3,13 +3,21 @@
 KubeRDE Architecture Diagram Generator
 
 This script generates the architecture diagram for KubeRDE (Kubernetes Remote Development Environment)
-using the Python Diagrams library.
+in the style of the Python Diagrams library, using that library's bundled icons.
+
+Each diagram is described as plain data (clusters, nodes and edges) and
+written out directly as DOT source for Graphviz. The SHA-256 of that
+description is stored next to the rendered image in a ``.sha256`` sidecar,
+and Graphviz is only invoked when the description changed.
 
 Requirements:
-    pip install diagrams
+    pip install diagrams  # provides the node icons
+    Graphviz (the `dot` binary)
+    pip install pygraphviz  # optional: render in-process instead of via `dot`
+    oxipng or pip install pillow  # optional: lossless PNG recompression
 
 Usage:
-    python docs/architecture.py
+    python docs/architecture.py [--format {png,svg}] [--force] [--quantize]
 
 Output:
     docs/kuberde_architecture.png       - Main system architecture
@@ -17,289 +25,679 @@ Output:
     docs/kuberde_operator_lifecycle.png - Operator reconciliation lifecycle
 """
 
-from diagrams import Diagram, Cluster, Edge
-from diagrams.onprem.client import User, Client
-from diagrams.onprem.compute import Server
-from diagrams.onprem.database import PostgreSQL
-from diagrams.onprem.iac import Ansible  # Use as generic auth icon
-from diagrams.k8s.compute import Pod, Deployment
-from diagrams.k8s.controlplane import APIServer
-from diagrams.k8s.storage import PV, PVC
-from diagrams.k8s.network import Ingress
-from diagrams.programming.framework import React
-from diagrams.programming.language import Go
-
-# Configure diagram attributes
+import argparse
+import functools
+import hashlib
+import importlib.metadata
+import importlib.util
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# Node kinds referenced by name from the diagram specs below, mapped to the
+# icon each one uses from the resources bundled with the diagrams package.
+NODE_KINDS = {
+    "User": "onprem/client/user.png",
+    "Client": "onprem/client/client.png",
+    "Server": "onprem/compute/server.png",
+    "PostgreSQL": "onprem/database/postgresql.png",
+    "Ansible": "onprem/iac/ansible.png",  # Use as generic auth icon
+    "Pod": "k8s/compute/pod.png",
+    "Deployment": "k8s/compute/deploy.png",
+    "APIServer": "k8s/controlplane/api.png",
+    "PV": "k8s/storage/pv.png",
+    "PVC": "k8s/storage/pvc.png",
+    "Ingress": "k8s/network/ing.png",
+    "React": "programming/framework/react.png",
+    "Go": "programming/language/go.png",
+}
+
+# Styling the diagrams library applies to a Diagram, its Clusters, Nodes and
+# Edges; kept identical so the generated images look the same.
+DIAGRAM_GRAPH_ATTRS = {
+    "pad": "2.0",
+    "splines": "ortho",
+    "nodesep": "0.60",
+    "ranksep": "0.75",
+    "fontname": "Sans-Serif",
+    "fontsize": "15",
+    "fontcolor": "#2D3436",
+}
+DIAGRAM_NODE_ATTRS = {
+    "shape": "box",
+    "style": "rounded",
+    "fixedsize": "true",
+    "width": "1.4",
+    "height": "1.4",
+    "labelloc": "b",
+    "imagescale": "true",
+    "fontname": "Sans-Serif",
+    "fontsize": "13",
+    "fontcolor": "#2D3436",
+}
+DIAGRAM_EDGE_ATTRS = {
+    "color": "#7B8894",
+}
+CLUSTER_GRAPH_ATTRS = {
+    "shape": "box",
+    "style": "rounded",
+    "labeljust": "l",
+    "pencolor": "#AEB6BE",
+    "fontname": "Sans-Serif",
+    "fontsize": "12",
+    "rankdir": "LR",
+}
+CLUSTER_BGCOLORS = ("#E5F5FD", "#EBF3E7", "#ECE8F6", "#FDF7E3")
+NODE_HEIGHT = 1.9
+EDGE_ATTRS = {
+    "fontcolor": "#2D3436",
+    "fontname": "Sans-Serif",
+    "fontsize": "13",
+}
+
+DOT_ID = re.compile(r"([a-zA-Z_][a-zA-Z0-9_]*|-?(\.[0-9]+|[0-9]+(\.[0-9]*)?))$")
+DOT_KEYWORDS = {"node", "edge", "graph", "digraph", "subgraph", "strict"}
+
+
+# Configure diagram attributes shared by every diagram. A spec can extend or
+# override them through its own "graph_attr", including the Graphviz
+# "layout" engine (dot by default).
 graph_attr = {
     "fontsize": "14",
     "bgcolor": "transparent",
     "pad": "0.5",
 }
 
+# Output formats selectable with --format. PNG is what the docs embed; SVG
+# skips Graphviz's raster pass, but node icons are referenced in the SVG by
+# absolute path into the installed diagrams package, so SVGs are only suited
+# to local viewing.
+OUTFORMATS = ("png", "svg")
+DEFAULT_OUTFORMAT = "png"
+
+
 # ─── Diagram 1: Main Architecture ─────────────────────────────────────────────
-with Diagram(
-    "KubeRDE Architecture",
-    filename="docs/kuberde_architecture",
-    show=False,
-    direction="TB",
-    graph_attr=graph_attr,
-    outformat="png"
-):
-
-    # External users
-    with Cluster("Users"):
-        web_user = User("Web User\n(Browser)")
-        cli_user = User("CLI / SSH User")
-
-    # Frontend layer
-    with Cluster("Frontend Layer"):
-        web_ui = React("Web UI\n(React + TypeScript)")
-
-    # Public access point
-    with Cluster("Public Access"):
-        ingress = Ingress("Ingress\n(*.frp.byai.uk)")
-
-    # Authentication service
-    with Cluster("Authentication"):
-        keycloak = Ansible("Keycloak\n(OIDC Provider)")
-
-    # HA Server — 3 replicas, each with embedded DERP relay
-    with Cluster("KubeRDE Server — 3 Replicas (HA)"):
-        server = Server("Server Pods\n:8080")
-        server_components = [
-            Go("REST API\n(/api/*)"),
-            Go("WebSocket Relay\n(/ws, /connect/*)"),
-            Go("DERP Relay\n(/derp, /derp-pod/{ip})"),
-            Go("Management API\n(/mgmt/*)"),
-            Go("Inter-Pod Fwd\n(httputil.ReverseProxy)"),
-        ]
-
-    # Shared database — stores both application state and agent session mapping
-    with Cluster("Shared State"):
-        database = PostgreSQL("PostgreSQL\n(app data +\nagent_pod_sessions)")
-
-    # Kubernetes cluster
-    with Cluster("Kubernetes Cluster"):
-        k8s_api = APIServer("K8s API Server")
+def architecture_spec():
+    """Nodes are (cluster path, id, kind, label); edges are
+    (src, dst, label, style, color) with None for unset attributes.
+    """
+    k8s = ("Kubernetes Cluster",)
+    workloads = k8s + ("Agent Workloads",)
+
+    nodes = [
+        # External users
+        (("Users",), "web_user", "User", "Web User\n(Browser)"),
+        (("Users",), "cli_user", "User", "CLI / SSH User"),
+
+        # Frontend layer
+        (("Frontend Layer",), "web_ui", "React", "Web UI\n(React + TypeScript)"),
+
+        # Public access point
+        (("Public Access",), "ingress", "Ingress", "Ingress\n(*.frp.byai.uk)"),
+
+        # Authentication service
+        (("Authentication",), "keycloak", "Ansible", "Keycloak\n(OIDC Provider)"),
+
+        # HA Server — 3 replicas, each with embedded DERP relay
+        (("KubeRDE Server — 3 Replicas (HA)",), "server", "Server", "Server Pods\n:8080"),
+        (("KubeRDE Server — 3 Replicas (HA)",), "rest_api", "Go", "REST API\n(/api/*)"),
+        (("KubeRDE Server — 3 Replicas (HA)",), "ws_relay", "Go", "WebSocket Relay\n(/ws, /connect/*)"),
+        (("KubeRDE Server — 3 Replicas (HA)",), "derp_relay", "Go", "DERP Relay\n(/derp, /derp-pod/{ip})"),
+        (("KubeRDE Server — 3 Replicas (HA)",), "mgmt_api", "Go", "Management API\n(/mgmt/*)"),
+        (("KubeRDE Server — 3 Replicas (HA)",), "pod_fwd", "Go", "Inter-Pod Fwd\n(httputil.ReverseProxy)"),
+
+        # Shared database — stores both application state and agent session mapping
+        (("Shared State",), "database", "PostgreSQL", "PostgreSQL\n(app data +\nagent_pod_sessions)"),
+
+        # Kubernetes cluster
+        (k8s, "k8s_api", "APIServer", "K8s API Server"),
 
         # Operator
-        with Cluster("Operator"):
-            operator = Deployment("KubeRDE Operator\n(Controller)")
-            operator_pod = Pod("Operator Pod")
+        (k8s + ("Operator",), "operator", "Deployment", "KubeRDE Operator\n(Controller)"),
+        (k8s + ("Operator",), "operator_pod", "Pod", "Operator Pod"),
 
         # Agent workloads
-        with Cluster("Agent Workloads"):
-            rde_agent_crd = Go("RDEAgent CRD\n(v1beta1)")
-
-            with Cluster("Agent Deployment"):
-                agent_deployment = Deployment("Agent Deployment")
-                agent_pod = Pod("Agent Pod\n(Go + Yamux + WireGuard key)")
-                agent_pvc = PVC("Workspace PVC")
-                agent_pv = PV("Persistent Volume")
-
-            with Cluster("Workload Container"):
-                workload = Pod("Dev Service\n(SSH/Jupyter/Coder/Files)")
-
-    # CLI client
-    cli = Client("kuberde-cli\n(Go)\n~/.kuberde/")
-
-    # ── Web user path ──────────────────────────────────────────────────────────
-    web_user >> Edge(label="HTTPS") >> ingress
-    ingress >> Edge(label="Frontend") >> web_ui
-    web_ui >> Edge(label="REST API\n(JWT Auth)") >> server
-
-    # ── CLI/SSH primary path: DERP relay (WireGuard encrypted) ────────────────
-    cli_user >> Edge(label="ssh kuberde-*\n(ProxyCommand)") >> cli
-    cli >> Edge(
-        label="1. DERP relay\n(WireGuard E2E)",
-        color="green",
-        style="bold"
-    ) >> ingress
-    ingress >> Edge(
-        label="/derp-pod/{podIP}\n→ same pod as agent",
-        color="green",
-        style="bold"
-    ) >> server
-
-    # ── CLI/SSH fallback path: WebSocket relay ─────────────────────────────────
-    cli >> Edge(
-        label="2. WebSocket fallback\n(/connect/{agentID})",
-        color="orange",
-        style="dashed"
-    ) >> ingress
-
-    # ── Authentication ─────────────────────────────────────────────────────────
-    web_ui >> Edge(label="OIDC Auth\n(/auth/*)") >> server
-    server >> Edge(label="JWKS Validation\nUser Provisioning") >> keycloak
-    cli >> Edge(label="OAuth2 Flow\n(login command)") >> keycloak
-
-    # ── Server ↔ Database ──────────────────────────────────────────────────────
-    server >> Edge(
-        label="CRUD + agent_pod_sessions\n(heartbeat every 2 min)"
-    ) >> database
-
-    # ── Server ↔ Kubernetes ───────────────────────────────────────────────────
-    server >> Edge(label="Create RDEAgent CR\nCreate PVC") >> k8s_api
-
-    # ── Server ↔ Agent ────────────────────────────────────────────────────────
-    server >> Edge(label="Yamux Streams\n(browser path)") >> agent_pod
-
-    # ── Operator control loop ─────────────────────────────────────────────────
-    operator >> Edge(label="Watch") >> k8s_api
-    k8s_api >> Edge(label="Events") >> operator
-    operator_pod >> Edge(label="Reconcile\nRDEAgent CRs") >> k8s_api
-    operator_pod >> Edge(
-        label="Poll /mgmt/agents/{id}\n(forwarded to correct pod)"
-    ) >> server
-    operator >> Edge(label="Create/Update\nDeployments") >> agent_deployment
-    operator >> Edge(label="Create/Bind\nPVCs") >> agent_pvc
-
-    # ── CRD → Deployment ──────────────────────────────────────────────────────
-    rde_agent_crd >> Edge(label="Defines") >> agent_deployment
-
-    # ── Agent → Server and Workload ───────────────────────────────────────────
-    agent_deployment >> agent_pod
-    agent_pod >> Edge(
-        label="WebSocket + Yamux\n(Client Credentials)\n→ upserts agent_pod_sessions"
-    ) >> server
-    agent_pod >> Edge(label="Register WireGuard key\n(/api/agent-coordination/)") >> server
-    agent_pod >> Edge(label="TCP Bridge\n(io.Copy)") >> workload
-    agent_pvc >> Edge(label="Mount") >> workload
-    agent_pv >> Edge(label="Bind") >> agent_pvc
-
-    # ── Subdomain HTTP proxy ───────────────────────────────────────────────────
-    ingress >> Edge(
-        label="HTTP Proxy\n(agent-id.domain)\n→ inter-pod forward if needed",
-        style="dashed",
-        color="blue"
-    ) >> server
+        (workloads, "rde_agent_crd", "Go", "RDEAgent CRD\n(v1beta1)"),
+        (workloads + ("Agent Deployment",), "agent_deployment", "Deployment", "Agent Deployment"),
+        (workloads + ("Agent Deployment",), "agent_pod", "Pod", "Agent Pod\n(Go + Yamux + WireGuard key)"),
+        (workloads + ("Agent Deployment",), "agent_pvc", "PVC", "Workspace PVC"),
+        (workloads + ("Agent Deployment",), "agent_pv", "PV", "Persistent Volume"),
+        (workloads + ("Workload Container",), "workload", "Pod", "Dev Service\n(SSH/Jupyter/Coder/Files)"),
+
+        # CLI client
+        ((), "cli", "Client", "kuberde-cli\n(Go)\n~/.kuberde/"),
+    ]
+
+    edges = [
+        # ── Web user path ──────────────────────────────────────────────────────
+        ("web_user", "ingress", "HTTPS", None, None),
+        ("ingress", "web_ui", "Frontend", None, None),
+        ("web_ui", "server", "REST API\n(JWT Auth)", None, None),
+
+        # ── CLI/SSH primary path: DERP relay (WireGuard encrypted) ────────────
+        ("cli_user", "cli", "ssh kuberde-*\n(ProxyCommand)", None, None),
+        ("cli", "ingress", "1. DERP relay\n(WireGuard E2E)", "bold", "green"),
+        ("ingress", "server", "/derp-pod/{podIP}\n→ same pod as agent", "bold", "green"),
+
+        # ── CLI/SSH fallback path: WebSocket relay ─────────────────────────────
+        ("cli", "ingress", "2. WebSocket fallback\n(/connect/{agentID})", "dashed", "orange"),
+
+        # ── Authentication ─────────────────────────────────────────────────────
+        ("web_ui", "server", "OIDC Auth\n(/auth/*)", None, None),
+        ("server", "keycloak", "JWKS Validation\nUser Provisioning", None, None),
+        ("cli", "keycloak", "OAuth2 Flow\n(login command)", None, None),
+
+        # ── Server ↔ Database ──────────────────────────────────────────────────
+        ("server", "database", "CRUD + agent_pod_sessions\n(heartbeat every 2 min)", None, None),
+
+        # ── Server ↔ Kubernetes ───────────────────────────────────────────────
+        ("server", "k8s_api", "Create RDEAgent CR\nCreate PVC", None, None),
+
+        # ── Server ↔ Agent ────────────────────────────────────────────────────
+        ("server", "agent_pod", "Yamux Streams\n(browser path)", None, None),
+
+        # ── Operator control loop ─────────────────────────────────────────────
+        ("operator", "k8s_api", "Watch", None, None),
+        ("k8s_api", "operator", "Events", None, None),
+        ("operator_pod", "k8s_api", "Reconcile\nRDEAgent CRs", None, None),
+        ("operator_pod", "server", "Poll /mgmt/agents/{id}\n(forwarded to correct pod)", None, None),
+        ("operator", "agent_deployment", "Create/Update\nDeployments", None, None),
+        ("operator", "agent_pvc", "Create/Bind\nPVCs", None, None),
+
+        # ── CRD → Deployment ──────────────────────────────────────────────────
+        ("rde_agent_crd", "agent_deployment", "Defines", None, None),
+
+        # ── Agent → Server and Workload ───────────────────────────────────────
+        ("agent_deployment", "agent_pod", None, None, None),
+        ("agent_pod", "server",
+         "WebSocket + Yamux\n(Client Credentials)\n→ upserts agent_pod_sessions", None, None),
+        ("agent_pod", "server", "Register WireGuard key\n(/api/agent-coordination/)", None, None),
+        ("agent_pod", "workload", "TCP Bridge\n(io.Copy)", None, None),
+        ("agent_pvc", "workload", "Mount", None, None),
+        ("agent_pv", "agent_pvc", "Bind", None, None),
+
+        # ── Subdomain HTTP proxy ───────────────────────────────────────────────
+        ("ingress", "server",
+         "HTTP Proxy\n(agent-id.domain)\n→ inter-pod forward if needed", "dashed", "blue"),
+    ]
+
+    return {
+        "title": "KubeRDE Architecture",
+        "direction": "TB",
+        "graph_attr": {},
+        "nodes": nodes,
+        "edges": edges,
+    }
 
 
 # ─── Diagram 2: Connection Data Flow ──────────────────────────────────────────
-with Diagram(
-    "KubeRDE Data Flow",
-    filename="docs/kuberde_data_flow",
-    show=False,
-    direction="LR",
-    graph_attr=graph_attr,
-    outformat="png"
-):
-
-    user = User("User")
-    cli_client = Client("kuberde-cli")
-
-    with Cluster("Authentication"):
-        auth_keycloak = Ansible("Keycloak\n(OIDC)")
-        auth_token = Go("JWT Token\n(~/.kuberde/token.json)")
-
-    with Cluster("Path A — DERP Relay (CLI/SSH, Primary)"):
-        derp_coord = Go("1. GET /api/agent-coordination\n(fetch agent WireGuard pubkey)")
-        derp_register = Go("2. POST .../peer\n(register CLI pubkey → server → agent)")
-        derp_server = Server("3. DERP Server\n(/derp-pod/{podIP})\nWireGuard E2E encrypted")
-        derp_agent = Pod("4. Agent Pod\n(WireGuard peer)")
-        derp_service = Pod("5. SSH / Dev Service")
-
-    with Cluster("Path B — WebSocket Relay (Browser / Fallback)"):
-        ws_server = Server("Server\n(/connect/{agentID})")
-        ws_yamux = Go("Yamux Stream\n(multiplexed)")
-        ws_agent = Pod("Agent Pod\n(yamux.Accept)")
-        ws_service = Pod("Dev Service")
-
-    # Authentication
-    user >> cli_client
-    cli_client >> Edge(label="login") >> auth_keycloak >> auth_token
-
-    # DERP path (primary for CLI/SSH)
-    auth_token >> derp_coord
-    derp_coord >> derp_register
-    derp_register >> derp_server
-    derp_server >> Edge(
-        label="WireGuard\nencrypted relay",
-        color="green",
-        style="bold"
-    ) >> derp_agent >> derp_service
-
-    # WebSocket path (browser or fallback)
-    auth_token >> ws_server
-    ws_server >> ws_yamux >> ws_agent >> ws_service
-
-    # Response paths
-    derp_service >> Edge(style="dashed", color="green") >> derp_agent
-    derp_agent >> Edge(style="dashed", color="green") >> derp_server
-    ws_service >> Edge(style="dashed") >> ws_agent
-    ws_agent >> Edge(style="dashed") >> ws_yamux
-    ws_yamux >> Edge(style="dashed") >> ws_server
+def data_flow_spec():
+    derp = ("Path A — DERP Relay (CLI/SSH, Primary)",)
+    ws = ("Path B — WebSocket Relay (Browser / Fallback)",)
+
+    nodes = [
+        ((), "user", "User", "User"),
+        ((), "cli_client", "Client", "kuberde-cli"),
+
+        (("Authentication",), "auth_keycloak", "Ansible", "Keycloak\n(OIDC)"),
+        (("Authentication",), "auth_token", "Go", "JWT Token\n(~/.kuberde/token.json)"),
+
+        (derp, "derp_coord", "Go", "1. GET /api/agent-coordination\n(fetch agent WireGuard pubkey)"),
+        (derp, "derp_register", "Go", "2. POST .../peer\n(register CLI pubkey → server → agent)"),
+        (derp, "derp_server", "Server", "3. DERP Server\n(/derp-pod/{podIP})\nWireGuard E2E encrypted"),
+        (derp, "derp_agent", "Pod", "4. Agent Pod\n(WireGuard peer)"),
+        (derp, "derp_service", "Pod", "5. SSH / Dev Service"),
+
+        (ws, "ws_server", "Server", "Server\n(/connect/{agentID})"),
+        (ws, "ws_yamux", "Go", "Yamux Stream\n(multiplexed)"),
+        (ws, "ws_agent", "Pod", "Agent Pod\n(yamux.Accept)"),
+        (ws, "ws_service", "Pod", "Dev Service"),
+    ]
+
+    edges = [
+        # Authentication
+        ("user", "cli_client", None, None, None),
+        ("cli_client", "auth_keycloak", "login", None, None),
+        ("auth_keycloak", "auth_token", None, None, None),
+
+        # DERP path (primary for CLI/SSH)
+        ("auth_token", "derp_coord", None, None, None),
+        ("derp_coord", "derp_register", None, None, None),
+        ("derp_register", "derp_server", None, None, None),
+        ("derp_server", "derp_agent", "WireGuard\nencrypted relay", "bold", "green"),
+        ("derp_agent", "derp_service", None, None, None),
+
+        # WebSocket path (browser or fallback)
+        ("auth_token", "ws_server", None, None, None),
+        ("ws_server", "ws_yamux", None, None, None),
+        ("ws_yamux", "ws_agent", None, None, None),
+        ("ws_agent", "ws_service", None, None, None),
+
+        # Response paths
+        ("derp_service", "derp_agent", None, "dashed", "green"),
+        ("derp_agent", "derp_server", None, "dashed", "green"),
+        ("ws_service", "ws_agent", None, "dashed", None),
+        ("ws_agent", "ws_yamux", None, "dashed", None),
+        ("ws_yamux", "ws_server", None, "dashed", None),
+    ]
+
+    return {
+        "title": "KubeRDE Data Flow",
+        "direction": "LR",
+        "graph_attr": {},
+        "nodes": nodes,
+        "edges": edges,
+    }
 
 
 # ─── Diagram 3: Operator Lifecycle ────────────────────────────────────────────
-with Diagram(
-    "KubeRDE Operator Lifecycle",
-    filename="docs/kuberde_operator_lifecycle",
-    show=False,
-    direction="TB",
-    graph_attr=graph_attr,
-    outformat="png"
-):
-
-    with Cluster("User Action"):
-        user_create = User("User")
-        web_ui_create = React("Web UI")
-        api_call = Go("POST /api/services")
-
-    with Cluster("Server Processing"):
-        server_handler = Server("Server Handler")
-        db_write = PostgreSQL("Write Service\nto Database")
-        cr_create = Go("Create RDEAgent CR")
-
-    with Cluster("Kubernetes"):
-        k8s_api_cr = APIServer("K8s API\n(CRD)")
-
-        with Cluster("Operator Watch Loop"):
-            operator_watch = Deployment("Operator")
-            operator_reconcile = Go("Reconcile Loop")
-            operator_create_deploy = Go("Create Deployment")
-            operator_create_pvc = Go("Create PVC")
-            operator_poll = Go("Poll Agent Stats\n(/mgmt/agents/{id})\nforwarded to correct pod")
-
-        with Cluster("Resources"):
-            deployment = Deployment("Agent Deployment")
-            pvc = PVC("Workspace PVC")
-            pod_running = Pod("Agent Pod\n(Running)")
-
-    with Cluster("Agent Connection & HA Registration"):
-        agent_connect = Go("Agent Connects\n(WebSocket + JWT)")
-        server_session = Server("Server Pod\n(Yamux Session)")
-        pg_session = PostgreSQL("agent_pod_sessions\n(pod_ip, heartbeat)")
-        agent_ready = Pod("Agent Ready\n(Serving)")
-
-    # User creates service
-    user_create >> web_ui_create >> api_call >> server_handler
-    server_handler >> db_write
-    server_handler >> cr_create >> k8s_api_cr
-
-    # Operator watches and reconciles
-    k8s_api_cr >> Edge(label="Watch Event") >> operator_watch
-    operator_watch >> operator_reconcile
-    operator_reconcile >> operator_create_deploy >> deployment
-    operator_reconcile >> operator_create_pvc >> pvc
-    deployment >> pod_running
-    pvc >> Edge(label="Mount") >> pod_running
-
-    # Agent connects and registers in PostgreSQL
-    pod_running >> agent_connect >> server_session
-    server_session >> Edge(label="Upsert pod_ip\n(2-min heartbeat)") >> pg_session
-    server_session >> Edge(label="Session Established") >> agent_ready
-
-    # Operator polls — forwarded to correct pod via pg_session lookup
-    operator_reconcile >> operator_poll >> server_session
-    server_session >> Edge(
-        label="Last Activity Time\n(Scale Down Logic)",
-        style="dashed"
-    ) >> operator_reconcile
-
-
-print("✅ Architecture diagrams generated successfully!")
-print("   - docs/kuberde_architecture.png")
-print("   - docs/kuberde_data_flow.png")
-print("   - docs/kuberde_operator_lifecycle.png")
-print("\nTo regenerate, run: python docs/architecture.py")
+def operator_lifecycle_spec():
+    k8s = ("Kubernetes",)
+    agent = ("Agent Connection & HA Registration",)
+
+    nodes = [
+        (("User Action",), "user_create", "User", "User"),
+        (("User Action",), "web_ui_create", "React", "Web UI"),
+        (("User Action",), "api_call", "Go", "POST /api/services"),
+
+        (("Server Processing",), "server_handler", "Server", "Server Handler"),
+        (("Server Processing",), "db_write", "PostgreSQL", "Write Service\nto Database"),
+        (("Server Processing",), "cr_create", "Go", "Create RDEAgent CR"),
+
+        (k8s, "k8s_api_cr", "APIServer", "K8s API\n(CRD)"),
+
+        (k8s + ("Operator Watch Loop",), "operator_watch", "Deployment", "Operator"),
+        (k8s + ("Operator Watch Loop",), "operator_reconcile", "Go", "Reconcile Loop"),
+        (k8s + ("Operator Watch Loop",), "operator_create_deploy", "Go", "Create Deployment"),
+        (k8s + ("Operator Watch Loop",), "operator_create_pvc", "Go", "Create PVC"),
+        (k8s + ("Operator Watch Loop",), "operator_poll", "Go",
+         "Poll Agent Stats\n(/mgmt/agents/{id})\nforwarded to correct pod"),
+
+        (k8s + ("Resources",), "deployment", "Deployment", "Agent Deployment"),
+        (k8s + ("Resources",), "pvc", "PVC", "Workspace PVC"),
+        (k8s + ("Resources",), "pod_running", "Pod", "Agent Pod\n(Running)"),
+
+        (agent, "agent_connect", "Go", "Agent Connects\n(WebSocket + JWT)"),
+        (agent, "server_session", "Server", "Server Pod\n(Yamux Session)"),
+        (agent, "pg_session", "PostgreSQL", "agent_pod_sessions\n(pod_ip, heartbeat)"),
+        (agent, "agent_ready", "Pod", "Agent Ready\n(Serving)"),
+    ]
+
+    edges = [
+        # User creates service
+        ("user_create", "web_ui_create", None, None, None),
+        ("web_ui_create", "api_call", None, None, None),
+        ("api_call", "server_handler", None, None, None),
+        ("server_handler", "db_write", None, None, None),
+        ("server_handler", "cr_create", None, None, None),
+        ("cr_create", "k8s_api_cr", None, None, None),
+
+        # Operator watches and reconciles
+        ("k8s_api_cr", "operator_watch", "Watch Event", None, None),
+        ("operator_watch", "operator_reconcile", None, None, None),
+        ("operator_reconcile", "operator_create_deploy", None, None, None),
+        ("operator_create_deploy", "deployment", None, None, None),
+        ("operator_reconcile", "operator_create_pvc", None, None, None),
+        ("operator_create_pvc", "pvc", None, None, None),
+        ("deployment", "pod_running", None, None, None),
+        ("pvc", "pod_running", "Mount", None, None),
+
+        # Agent connects and registers in PostgreSQL
+        ("pod_running", "agent_connect", None, None, None),
+        ("agent_connect", "server_session", None, None, None),
+        ("server_session", "pg_session", "Upsert pod_ip\n(2-min heartbeat)", None, None),
+        ("server_session", "agent_ready", "Session Established", None, None),
+
+        # Operator polls — forwarded to correct pod via pg_session lookup
+        ("operator_reconcile", "operator_poll", None, None, None),
+        ("operator_poll", "server_session", None, None, None),
+        ("server_session", "operator_reconcile", "Last Activity Time\n(Scale Down Logic)", "dashed", None),
+    ]
+
+    return {
+        "title": "KubeRDE Operator Lifecycle",
+        "direction": "TB",
+        "graph_attr": {},
+        "nodes": nodes,
+        "edges": edges,
+    }
+
+
+# Specs are plain data, built once at import and shared by the hashing,
+# freshness checks and rendering below.
+DIAGRAMS = (
+    ("kuberde_architecture", architecture_spec()),
+    ("kuberde_data_flow", data_flow_spec()),
+    ("kuberde_operator_lifecycle", operator_lifecycle_spec()),
+)
+
+
+@functools.lru_cache(maxsize=None)
+def resources_dir():
+    """Return the icon resources directory installed with diagrams.
+
+    Locating the package walks sys.path, so the result is cached for the
+    life of the process rather than repeated for every node.
+    """
+    spec = importlib.util.find_spec("diagrams")
+    if spec is None:
+        raise SystemExit("diagrams is not installed; run: pip install diagrams")
+    return os.path.join(os.path.dirname(os.path.dirname(spec.origin)), "resources")
+
+
+@functools.lru_cache(maxsize=None)
+def icons_version():
+    """Return the installed diagrams version, or None if it is missing."""
+    try:
+        return importlib.metadata.version("diagrams")
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def icon_path(kind):
+    """Return the absolute path of the icon for a NODE_KINDS name."""
+    return os.path.join(resources_dir(), NODE_KINDS[kind])
+
+
+def quote(value):
+    """Quote a DOT identifier or attribute value if it is not a bare ID."""
+    if DOT_ID.match(value) and value.lower() not in DOT_KEYWORDS:
+        return value
+    return '"' + value.replace('"', '\\"') + '"'
+
+
+def attr_list(attrs, label=None):
+    """Format a DOT attribute list: label (if given) first, the rest sorted."""
+    items = [f"label={quote(label)}"] if label is not None else []
+    items += [f"{k}={quote(v)}" for k, v in sorted(attrs.items())]
+    return "[" + " ".join(items) + "]"
+
+
+@functools.lru_cache(maxsize=None)
+def edge_attr_list(label, style, color):
+    """Return the DOT attribute list for an edge; most edges share a handful
+    of label-less style/color combinations, so these are formatted once.
+    """
+    attrs = dict(EDGE_ATTRS, dir="forward")
+    if style:
+        attrs["style"] = style
+    if color:
+        attrs["color"] = color
+    return attr_list(attrs, label or None)
+
+
+def spec_graph_attr(spec):
+    """Return the shared graph_attr with the spec's own overrides applied."""
+    return {**graph_attr, **spec.get("graph_attr", {})}
+
+
+@functools.lru_cache(maxsize=None)
+def node_attr_list(kind, label):
+    """Return the DOT attribute list for a node of this kind and label.
+
+    Nodes with the same kind and label (e.g. "Workspace PVC" in both the
+    architecture and lifecycle diagrams) render identically, so the
+    formatted attributes are shared rather than rebuilt per occurrence.
+    """
+    # Taller nodes for multi-line labels, so the label stays below the icon
+    attrs = {
+        "shape": "none",
+        "height": str(NODE_HEIGHT + 0.4 * label.count("\n")),
+        "image": icon_path(kind),
+    }
+    return attr_list(attrs, label)
+
+
+def to_dot(spec):
+    """Build the DOT source for a diagram spec.
+
+    Clusters are nested subgraphs opened and closed as the node cluster path
+    changes, matching the structure the diagrams context managers produce.
+    """
+    body = []
+    open_clusters = []  # (label, lines), outermost first
+
+    def close_cluster():
+        label, lines = open_clusters.pop()
+        parent = open_clusters[-1][1] if open_clusters else body
+        parent.append(f"subgraph {quote('cluster_' + label)} {{")
+        parent.extend("\t" + line for line in lines)
+        parent.append("}")
+
+    for path, node_id, kind, label in spec["nodes"]:
+        depth = 0
+        while (depth < min(len(path), len(open_clusters))
+               and open_clusters[depth][0] == path[depth]):
+            depth += 1
+        while len(open_clusters) > depth:
+            close_cluster()
+        for cluster_label in path[depth:]:
+            attrs = dict(CLUSTER_GRAPH_ATTRS, label=cluster_label)
+            attrs["bgcolor"] = CLUSTER_BGCOLORS[len(open_clusters) % len(CLUSTER_BGCOLORS)]
+            open_clusters.append((cluster_label, [f"graph {attr_list(attrs)}"]))
+        (open_clusters[-1][1] if open_clusters else body).append(
+            f"{quote(node_id)} {node_attr_list(kind, label)}"
+        )
+    while open_clusters:
+        close_cluster()
+
+    for src, dst, label, style, color in spec["edges"]:
+        body.append(f"{quote(src)} -> {quote(dst)} {edge_attr_list(label, style, color)}")
+
+    graph = dict(DIAGRAM_GRAPH_ATTRS, label=spec["title"], rankdir=spec["direction"])
+    graph.update(spec_graph_attr(spec))
+    lines = [
+        f"digraph {quote(spec['title'])} {{",
+        f"\tgraph {attr_list(graph)}",
+        f"\tnode {attr_list(DIAGRAM_NODE_ATTRS)}",
+        f"\tedge {attr_list(DIAGRAM_EDGE_ATTRS)}",
+    ]
+    lines.extend("\t" + line for line in body)
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+@functools.lru_cache(maxsize=None)
+def have_module(name):
+    """Return True if an optional dependency is importable."""
+    return importlib.util.find_spec(name) is not None
+
+
+def render_dot(source, path, outformat, layout="dot"):
+    """Lay out DOT source with the given engine and write it to path in the
+    given format.
+
+    Uses pygraphviz when installed, so libgvc and the font cache are loaded
+    once per process; otherwise pipes the source to the dot binary.
+    """
+    if have_module("pygraphviz"):
+        import pygraphviz
+
+        graph = pygraphviz.AGraph(string=source)
+        graph.layout(prog=layout)
+        graph.draw(path, format=outformat)
+    else:
+        subprocess.run(
+            ["dot", f"-K{layout}", f"-T{outformat}", "-o", path],
+            input=source.encode("utf-8"),
+            check=True,
+        )
+
+
+def optimize_png(path):
+    """Losslessly recompress a rendered PNG with oxipng, or Pillow if oxipng
+    is not installed. Does nothing when neither is available.
+
+    Ancillary metadata (timestamps, text, colour profiles) is stripped so
+    that re-rendering an unchanged diagram produces a byte-identical file
+    when oxipng or Pillow is available.
+    """
+    if shutil.which("oxipng"):
+        subprocess.run(["oxipng", "-q", "-o", "4", "--strip", "all", path], check=True)
+    elif have_module("PIL"):
+        from PIL import Image
+        from PIL.PngImagePlugin import PngInfo
+
+        with Image.open(path) as image:
+            image.load()
+        image.save(path, optimize=True, pnginfo=PngInfo(), icc_profile=None)
+
+
+def quantize_png(path):
+    """Convert a rendered PNG to an 8-bit palette image in place.
+
+    The diagrams are line art with few distinct colours, so 256 palette
+    entries are enough; dithering is disabled to keep flat fills flat.
+    libimagequant is used when Pillow was built with it.
+    """
+    from PIL import Image, features
+
+    if features.check_feature("libimagequant"):
+        method = Image.Quantize.LIBIMAGEQUANT
+    else:
+        method = Image.Quantize.FASTOCTREE
+    with Image.open(path) as image:
+        image = image.convert("RGBA")
+    image.quantize(colors=256, method=method, dither=Image.Dither.NONE).save(path)
+
+
+def spec_digest(spec, outformat=DEFAULT_OUTFORMAT, quantize=False):
+    """Return the SHA-256 of a diagram's DOT source and the render settings
+    applied to it.
+
+    Hashing the emitted DOT rather than the spec covers the node, edge and
+    cluster styling tables as well. The diagrams version is included because
+    the icon files are read from that package and may change in place.
+    """
+    canonical = json.dumps(
+        {
+            "dot": to_dot(spec),
+            "layout": spec_graph_attr(spec).get("layout", "dot"),
+            "outformat": outformat,
+            "quantize": quantize,
+            "icons": icons_version(),
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def is_current(name, digest, outformat=DEFAULT_OUTFORMAT):
+    """Return True if docs/<name> was last rendered from a spec with this digest."""
+    output = f"docs/{name}.{outformat}"
+    sidecar = f"{output}.sha256"
+    if not (os.path.exists(output) and os.path.exists(sidecar)):
+        return False
+    with open(sidecar, encoding="utf-8") as f:
+        return f.read().strip() == digest
+
+
+def render_diagram(name, spec, digest, outformat=DEFAULT_OUTFORMAT, quantize=False):
+    """Render docs/<name>.<outformat> from spec and record digest in its
+    sidecar. PNG output is palette-quantized first if quantize is set.
+    """
+    filename = f"docs/{name}"
+    sidecar = f"{filename}.{outformat}.sha256"
+
+    layout = spec_graph_attr(spec).get("layout", "dot")
+    render_dot(to_dot(spec), f"{filename}.{outformat}", outformat, layout)
+
+    if outformat == "png":
+        if quantize:
+            quantize_png(f"{filename}.png")
+        optimize_png(f"{filename}.png")
+
+    with open(sidecar, "w", encoding="utf-8") as f:
+        f.write(digest + "\n")
+
+
+def build_diagram(name, spec, outformat=DEFAULT_OUTFORMAT, force=False, quantize=False):
+    """Render docs/<name>.<outformat> from spec unless its sidecar hash
+    is current (or force is set).
+
+    Returns True if Graphviz was invoked, False on a cache hit.
+    """
+    digest = spec_digest(spec, outformat, quantize)
+    if not force and is_current(name, digest, outformat):
+        return False
+    render_diagram(name, spec, digest, outformat, quantize)
+    return True
+
+
+def build_all(diagrams, outformat=DEFAULT_OUTFORMAT, force=False, quantize=False):
+    """Build every (name, spec) pair and return a map of name to whether it
+    was rendered.
+
+    With pygraphviz, stale diagrams are rendered sequentially in this process
+    so libgvc and the font cache are loaded only once. Otherwise each one gets
+    its own worker process running the dot binary, which is single-threaded
+    per graph.
+    """
+    results = {}
+    stale = []
+    for name, spec in diagrams:
+        digest = spec_digest(spec, outformat, quantize)
+        if not force and is_current(name, digest, outformat):
+            results[name] = False
+        else:
+            stale.append((name, spec, digest))
+
+    # Stale diagrams are rendered directly; their sidecars were checked above
+    if len(stale) > 1 and not have_module("pygraphviz"):
+        with ProcessPoolExecutor(max_workers=len(stale)) as pool:
+            futures = [
+                pool.submit(render_diagram, name, spec, digest, outformat, quantize)
+                for name, spec, digest in stale
+            ]
+            for future in futures:
+                future.result()
+    else:
+        for name, spec, digest in stale:
+            render_diagram(name, spec, digest, outformat, quantize)
+    results.update((name, True) for name, _, _ in stale)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the KubeRDE architecture diagrams.")
+    parser.add_argument(
+        "--format",
+        choices=OUTFORMATS,
+        default=DEFAULT_OUTFORMAT,
+        help="output image format (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="re-render every diagram even if its output is up to date",
+    )
+    parser.add_argument(
+        "--quantize",
+        action="store_true",
+        help="reduce PNG output to an 8-bit palette (lossy, requires Pillow)",
+    )
+    args = parser.parse_args()
+    if args.quantize and not (args.format == "png" and have_module("PIL")):
+        parser.error("--quantize needs --format png and Pillow (pip install pillow)")
+    if args.format == "png" and not (shutil.which("oxipng") or have_module("PIL")):
+        print(
+            "⚠️  PNG metadata is not stripped; install oxipng or Pillow for "
+            "byte-identical re-renders.",
+            file=sys.stderr,
+        )
+
+    results = build_all(DIAGRAMS, args.format, args.force, args.quantize)
+    if not any(results.values()):
+        print("✅ Architecture diagrams are up to date.")
+        sys.exit(0)
+
+    lines = ["✅ Architecture diagrams generated successfully!"]
+    for name, _ in DIAGRAMS:
+        lines.append(f"   - docs/{name}.{args.format}" + ("" if results[name] else " (unchanged)"))
+    lines.append("\nTo regenerate, run: python docs/architecture.py")
+    sys.stdout.write("\n".join(lines) + "\n")